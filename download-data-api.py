@@ -4,190 +4,344 @@ Zendesk Help Center Data Exporter
 Downloads all articles, sections, categories, and attachments from Zendesk Help Center
 """
 
+import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
+import shutil
+import threading
 import time
 from urllib.parse import urlparse
-import base64
 import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Attachment downloads are network-bound, so a modest pool keeps many requests in flight.
+# Default for ZendeskExporter(max_workers=...); large help centres can raise it.
+MAX_WORKERS = 16
+# Attachments are copied to disk in chunks of this size rather than buffered whole
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Largest page size the Help Center cursor pagination accepts
+PAGE_SIZE = 100
+
+# Zendesk article attachment URLs (prefix escaped once here), and a single-pass scanner
+# that yields either a whole <img> tag (group 1) or a bare attachment URL outside of one
+# (group 2)
+ATTACHMENT_URL_PREFIX = "https://support.userology.co/hc/article_attachments/"
+_ATTACH_URL_PATTERN = re.escape(ATTACHMENT_URL_PREFIX) + r'(\d+)'
+_ATTACH_URL_RE = re.compile(_ATTACH_URL_PATTERN)
+_ATTACH_RE = re.compile(r'((?i:<img)\b[^>]*>)|' + _ATTACH_URL_PATTERN)
+# Attribute name/value pairs inside a tag, in either quoting style
+_ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+# Temp files for in-flight downloads: ".<target>.<thread id>.part". Real attachment
+# filenames always start with a numeric id, so they can never match this.
+_PARTIAL_DOWNLOAD_RE = re.compile(r'^\..+\.\d+\.part$')
+
+# Shared encoder for compact export files; compact output keeps CPython's C encoder in use
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
 
 class ZendeskExporter:
-    def __init__(self, subdomain, email, api_token):
+    def __init__(self, subdomain, email, api_token, max_workers=MAX_WORKERS):
         self.subdomain = subdomain
         self.email = email
         self.api_token = api_token
         self.base_url = f"https://{subdomain}.zendesk.com/api/v2"
         self.hc_base_url = f"https://{subdomain}.zendesk.com/api/v2/help_center"
         self.session = requests.Session()
+        # Response compression is negotiated by requests itself: Accept-Encoding always
+        # offers gzip/deflate, and adds br when a Brotli decoder (brotli/brotlicffi) is
+        # installed, so the header is deliberately not overridden here
         
-        # Set up authentication
-        credentials = f"{email}/token:{api_token}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        self.session.headers.update({
-            'Authorization': f'Basic {encoded_credentials}',
-            'Content-Type': 'application/json'
-        })
+        # Keep a warm keep-alive pool per host, large enough that concurrent downloads
+        # reuse TLS connections instead of discarding and re-opening them. Rate limits and
+        # transient 5xx errors are retried with jittered exponential backoff, honouring
+        # Retry-After when Zendesk sends it.
+        retries = Retry(
+            total=8,
+            backoff_factor=0.5,
+            backoff_jitter=0.25,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True
+        )
+        # pool_block caps sockets per host at pool_maxsize: a request that finds every
+        # connection busy waits for one instead of opening a throwaway TLS connection
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max_workers,
+            pool_block=True,
+            max_retries=retries
+        )
+        self.session.mount('https://', adapter)
+        
+        # Set up authentication (Zendesk API tokens use "<email>/token" as the username)
+        self.session.auth = (f"{email}/token", api_token)
         
         # Create export directory
         self.export_dir = f"zendesk_export_{subdomain}"
         os.makedirs(self.export_dir, exist_ok=True)
-        os.makedirs(f"{self.export_dir}/attachments", exist_ok=True)
+        self.attachments_dir = f"{self.export_dir}/attachments"
+        os.makedirs(self.attachments_dir, exist_ok=True)
+        # Drop partial downloads left behind by an interrupted run
+        for entry in os.scandir(self.attachments_dir):
+            if _PARTIAL_DOWNLOAD_RE.match(entry.name):
+                os.remove(entry.path)
+
+        # Attachment downloads run on a pool that export_articles opens for each export
+        self.max_workers = max_workers
+        self.pool = None
+        self.print_lock = threading.Lock()
+
+    def log(self, message):
+        """Print a progress message; safe to call from concurrently running exports"""
+        with self.print_lock:
+            print(message)
 
     def make_request(self, url, params=None):
-        """Make API request with rate limiting"""
+        """Make API request (rate limiting and retries are handled by the session adapter)"""
         try:
-            response = self.session.get(url, params=params)
-            
-            # Handle rate limiting
-            if response.status_code == 429:
-                retry_after = int(response.headers.get('Retry-After', 60))
-                print(f"Rate limited. Waiting {retry_after} seconds...")
-                time.sleep(retry_after)
-                return self.make_request(url, params)
-            
+            response = self.session.get(url, params=params, timeout=30)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
-            print(f"Error making request to {url}: {e}")
+            self.log(f"Error making request to {url}: {e}")
             return None
 
-    def get_all_paginated(self, endpoint, key):
-        """Get all results from a paginated endpoint"""
+    def iter_paginated(self, endpoint, key):
+        """Yield results from a paginated endpoint page by page, using cursor pagination
+
+        Callers can start working on a page's items before the next page is requested.
+        """
         url = f"{self.hc_base_url}/{endpoint}"
-        all_items = []
+        # Only the first request carries page[size]; the links.next URL already encodes
+        # the page size and cursor for the following ones
+        params = {'page[size]': PAGE_SIZE}
         
         while url:
-            print(f"Fetching: {url}")
-            data = self.make_request(url)
+            self.log(f"Fetching: {url}")
+            data = self.make_request(url, params)
             if not data:
                 break
                 
-            all_items.extend(data.get(key, []))
-            url = data.get('next_page')
-            
-            # Small delay to be nice to the API
-            time.sleep(0.1)
-        
-        return all_items
+            yield from data.get(key, [])
+            params = None
+            if 'meta' in data:
+                url = data['links'].get('next') if data['meta'].get('has_more') else None
+            else:
+                # Endpoint answered with offset pagination
+                url = data.get('next_page')
+
+    def get_all_paginated(self, endpoint, key):
+        """Get all results from a paginated endpoint"""
+        return list(self.iter_paginated(endpoint, key))
 
     def download_attachment(self, attachment_url, filename):
-        """Download and save an attachment"""
+        """Download and save an attachment, streaming it straight to disk"""
+        filepath = f"{self.attachments_dir}/{filename}"
+        # Resume support: files only get their final name once fully written, so one
+        # left by an earlier run is complete and can be reused without a request
+        if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+            return filepath
+        
+        # Each worker thread runs one download at a time, so its id keeps the temp file
+        # private to this download even if another one targets the same name
+        partial_path = f"{self.attachments_dir}/.{filename}.{threading.get_ident()}.part"
         try:
-            response = self.session.get(attachment_url)
-            response.raise_for_status()
-            
-            filepath = os.path.join(self.export_dir, "attachments", filename)
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            with self.session.get(attachment_url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                # Copy from the raw urllib3 stream without a per-chunk Python loop; still
+                # undo any Content-Encoding the server applied
+                response.raw.decode_content = True
+                with open(partial_path, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+            os.replace(partial_path, filepath)
             
             return filepath
         except Exception as e:
-            print(f"Error downloading attachment {filename}: {e}")
+            self.log(f"Error downloading attachment {filename}: {e}")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
             return None
 
-    def extract_attachments_from_html(self, html_content, article_id):
-        """Extract attachment URLs from HTML content"""
-        # Pattern to match Zendesk article attachment URLs
-        pattern = r'https://support\.userology\.co/hc/article_attachments/(\d+)'
-        matches = re.findall(pattern, html_content)
-        
-        attachments = []
-        for i, attachment_id in enumerate(matches):
-            attachment_url = f"https://support.userology.co/hc/article_attachments/{attachment_id}"
-            # Try to get the original filename from the HTML
-            img_pattern = rf'<img[^>]*src="{re.escape(attachment_url)}"[^>]*alt="([^"]*)"'
-            img_match = re.search(img_pattern, html_content)
-            if img_match:
-                original_filename = img_match.group(1)
+    def schedule_download(self, attachment_url, filename):
+        """Queue an attachment download on the pool and return its future"""
+        return self.pool.submit(self.download_attachment, attachment_url, filename)
+
+    def parse_attachment_refs(self, html_content):
+        """Map attachment ids referenced in HTML (in document order) to their alt text, if any"""
+        refs = {}
+        for match in _ATTACH_RE.finditer(html_content):
+            tag = match.group(1)
+            if tag is None:
+                refs.setdefault(match.group(2), None)
+                continue
+
+            attrs = {name.lower(): dq or sq for name, dq, sq in _ATTR_RE.findall(tag)}
+            src_match = _ATTACH_URL_RE.match(attrs.get('src', ''))
+            if src_match:
+                attachment_id = src_match.group(1)
+                if attrs.get('alt') and not refs.get(attachment_id):
+                    refs[attachment_id] = attrs['alt']
+                else:
+                    refs.setdefault(attachment_id, None)
+            # Attachment URLs can also appear in other attributes (e.g. srcset, data-src)
+            for attachment_id in _ATTACH_URL_RE.findall(tag):
+                refs.setdefault(attachment_id, None)
+        return refs
+
+    def extract_attachments_from_html(self, html_content, downloads):
+        """Queue downloads for attachments referenced in HTML content
+
+        downloads maps attachment id -> download record and is shared across articles, so
+        an attachment referenced by several articles is only fetched once. Returns the
+        attachment ids referenced by this HTML, in document order.
+        """
+        alt_texts = self.parse_attachment_refs(html_content)
+        for attachment_id, alt_text in alt_texts.items():
+            if attachment_id in downloads:
+                continue
+            attachment_url = f"{ATTACHMENT_URL_PREFIX}{attachment_id}"
+            original_filename = alt_text or f"attachment_{attachment_id}"
+            filename = f"{attachment_id}_{original_filename}"
+            downloads[attachment_id] = {
+                'future': self.schedule_download(attachment_url, filename),
+                'original_url': attachment_url,
+                'filename': filename,
+                'original_filename': original_filename
+            }
+        return list(alt_texts)
+
+    def save_json(self, filename, data, compact=False):
+        """Save data as JSON in the export directory
+
+        Files are pretty-printed with indent=2 unless compact is set. Compact lists are
+        encoded one item at a time, so a large export such as the articles is never held
+        in memory as a single serialized string.
+        """
+        with open(f"{self.export_dir}/{filename}", 'w', encoding='utf-8') as f:
+            if not compact:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            elif isinstance(data, list):
+                f.write('[')
+                for i, item in enumerate(data):
+                    if i:
+                        f.write(', ')
+                    f.write(_JSON_ENCODER.encode(item))
+                f.write(']')
             else:
-                original_filename = f"attachment_{attachment_id}"
-            
-            filename = f"{article_id}_{i+1}_{original_filename}"
-            filepath = self.download_attachment(attachment_url, filename)
-            if filepath:
-                attachments.append({
-                    'attachment_id': attachment_id,
-                    'original_url': attachment_url,
-                    'local_path': filepath,
-                    'filename': filename,
-                    'original_filename': original_filename
-                })
-                print(f"Downloaded attachment: {filename}")
-        
-        return attachments
+                f.write(_JSON_ENCODER.encode(data))
 
     def export_categories(self):
         """Export all categories"""
-        print("Exporting categories...")
+        self.log("Exporting categories...")
         categories = self.get_all_paginated("categories", "categories")
         
-        with open(f"{self.export_dir}/categories.json", 'w', encoding='utf-8') as f:
-            json.dump(categories, f, indent=2, ensure_ascii=False)
+        self.save_json("categories.json", categories)
         
-        print(f"Exported {len(categories)} categories")
+        self.log(f"Exported {len(categories)} categories")
         return categories
 
     def export_sections(self):
         """Export all sections"""
-        print("Exporting sections...")
+        self.log("Exporting sections...")
         sections = self.get_all_paginated("sections", "sections")
         
-        with open(f"{self.export_dir}/sections.json", 'w', encoding='utf-8') as f:
-            json.dump(sections, f, indent=2, ensure_ascii=False)
+        self.save_json("sections.json", sections)
         
-        print(f"Exported {len(sections)} sections")
+        self.log(f"Exported {len(sections)} sections")
         return sections
 
     def export_articles(self):
         """Export all articles with their attachments"""
-        print("Exporting articles...")
-        articles = self.get_all_paginated("articles", "articles")
+        self.log("Exporting articles...")
         
-        # Download article attachments
-        total_attachments = 0
-        for article in articles:
-            article['downloaded_attachments'] = []
-            
-            # Check for traditional attachments (if any)
-            if article.get('attachments'):
-                for attachment in article['attachments']:
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            # Queue every download before waiting on any of them. Downloads for a page start
+            # while the next page is still being fetched. Attachments embedded in HTML are
+            # de-duplicated across all articles by attachment id.
+            articles = []
+            pending = []
+            html_downloads = {}
+            html_refs = []
+            queued_filenames = set()
+            for article in self.iter_paginated("articles", "articles"):
+                articles.append(article)
+                article['downloaded_attachments'] = []
+                for attachment in article.get('attachments') or []:
                     filename = f"{article['id']}_{attachment['file_name']}"
-                    filepath = self.download_attachment(attachment['content_url'], filename)
-                    if filepath:
-                        article['downloaded_attachments'].append({
-                            'original_url': attachment['content_url'],
-                            'local_path': filepath,
-                            'filename': filename
-                        })
-                        total_attachments += 1
+                    # Two attachments with the same file name on one article must not share
+                    # a target file
+                    n = 1
+                    while filename in queued_filenames:
+                        n += 1
+                        filename = f"{article['id']}_{n}_{attachment['file_name']}"
+                    queued_filenames.add(filename)
+                    future = self.schedule_download(attachment['content_url'], filename)
+                    pending.append((article, future, attachment['content_url'], filename))
             
-            # Extract and download attachments from HTML content
-            if article.get('body'):
-                html_attachments = self.extract_attachments_from_html(article['body'], article['id'])
-                article['downloaded_attachments'].extend(html_attachments)
-                total_attachments += len(html_attachments)
+                if article.get('body'):
+                    attachment_ids = self.extract_attachments_from_html(article['body'], html_downloads)
+                    html_refs.append((article, attachment_ids))
+
+            # Resolve each unique HTML attachment once
+            html_attachments = {}
+            for attachment_id, download in html_downloads.items():
+                filepath = download['future'].result()
+                if filepath:
+                    html_attachments[attachment_id] = {
+                        'attachment_id': attachment_id,
+                        'original_url': download['original_url'],
+                        'local_path': filepath,
+                        'filename': download['filename'],
+                        'original_filename': download['original_filename']
+                    }
+                    self.log(f"Downloaded attachment: {download['filename']}")
+            total_attachments = len(html_attachments)
+
+            # Traditional attachments go first in each article's list, then the HTML ones
+            for article, future, original_url, filename in pending:
+                filepath = future.result()
+                if filepath:
+                    article['downloaded_attachments'].append({
+                        'original_url': original_url,
+                        'local_path': filepath,
+                        'filename': filename
+                    })
+                    total_attachments += 1
+
+            for article, attachment_ids in html_refs:
+                article['downloaded_attachments'].extend(
+                    html_attachments[attachment_id]
+                    for attachment_id in attachment_ids
+                    if attachment_id in html_attachments
+                )
+        finally:
+            # Every download has been collected on success; on error drop whatever is
+            # still queued instead of letting it run on
+            self.pool.shutdown(cancel_futures=True)
         
-        with open(f"{self.export_dir}/articles.json", 'w', encoding='utf-8') as f:
-            json.dump(articles, f, indent=2, ensure_ascii=False)
+        # articles.json is by far the largest file, so it is written compact for speed
+        self.save_json("articles.json", articles, compact=True)
         
-        print(f"Exported {len(articles)} articles")
-        print(f"Downloaded {total_attachments} attachments")
+        self.log(f"Exported {len(articles)} articles")
+        self.log(f"Downloaded {total_attachments} attachments")
         return articles
 
     def export_themes(self):
         """Export theme information"""
-        print("Exporting theme data...")
+        self.log("Exporting theme data...")
         try:
             # Get theme info
             theme_data = self.make_request(f"{self.hc_base_url}/themes")
             
             if theme_data:
-                with open(f"{self.export_dir}/themes.json", 'w', encoding='utf-8') as f:
-                    json.dump(theme_data, f, indent=2, ensure_ascii=False)
-                print("Theme data exported")
+                self.save_json("themes.json", theme_data)
+                self.log("Theme data exported")
         except Exception as e:
-            print(f"Could not export theme data: {e}")
+            self.log(f"Could not export theme data: {e}")
 
     def export_all(self):
         """Export all Help Center data"""
@@ -200,10 +354,17 @@ class ZendeskExporter:
             'base_url': f"https://{self.subdomain}.zendesk.com"
         }
         
-        categories = self.export_categories()
-        sections = self.export_sections()
-        articles = self.export_articles()
-        self.export_themes()
+        # The endpoints are independent, so fetch them side by side; categories, sections
+        # and themes finish while articles are still paginating
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            categories_future = executor.submit(self.export_categories)
+            sections_future = executor.submit(self.export_sections)
+            articles_future = executor.submit(self.export_articles)
+            themes_future = executor.submit(self.export_themes)
+            categories = categories_future.result()
+            sections = sections_future.result()
+            articles = articles_future.result()
+            themes_future.result()
         
         # Update manifest
         manifest.update({
@@ -212,8 +373,7 @@ class ZendeskExporter:
             'total_articles': len(articles)
         })
         
-        with open(f"{self.export_dir}/manifest.json", 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        self.save_json("manifest.json", manifest)
         
         print(f"\n✅ Export completed!")
         print(f"📁 Data saved to: {self.export_dir}/")
@@ -223,13 +383,26 @@ class ZendeskExporter:
         print(f"   - Articles: {len(articles)}")
 
 def main():
-    # Configuration
-    SUBDOMAIN = "userology"  # Your Zendesk subdomain
-    EMAIL = input("Enter your Zendesk admin email: ")
-    API_TOKEN = "xYKvKq5zKg9a0V6rL28prhZZmyks8FnR5AQE3Phu"  # Your API token
+    # Configuration: command-line flags, falling back to the environment so the exporter
+    # can run unattended (CI, containers) without prompting
+    parser = argparse.ArgumentParser(description="Export a Zendesk Help Center")
+    parser.add_argument('--subdomain', default=os.environ.get('ZENDESK_SUBDOMAIN', 'userology'),
+                        help="Zendesk subdomain (env: ZENDESK_SUBDOMAIN)")
+    parser.add_argument('--email', default=os.environ.get('ZENDESK_EMAIL'),
+                        help="Zendesk admin email (env: ZENDESK_EMAIL)")
+    parser.add_argument('--token', default=os.environ.get('ZENDESK_TOKEN'),
+                        help="Zendesk API token (env: ZENDESK_TOKEN)")
+    parser.add_argument('--max-workers', type=int, default=MAX_WORKERS,
+                        help=f"Concurrent attachment downloads (default: {MAX_WORKERS})")
+    args = parser.parse_args()
+    if not args.email or not args.token:
+        parser.error("Zendesk credentials are required: set ZENDESK_EMAIL and ZENDESK_TOKEN "
+                     "or pass --email and --token")
+    if args.max_workers < 1:
+        parser.error("--max-workers must be at least 1")
     
     # Create exporter and run
-    exporter = ZendeskExporter(SUBDOMAIN, EMAIL, API_TOKEN)
+    exporter = ZendeskExporter(args.subdomain, args.email, args.token, max_workers=args.max_workers)
     exporter.export_all()
 
 if __name__ == "__main__":
@@ -10,6 +10,10 @@ import re
 from datetime import datetime
 from urllib.parse import urlparse
 
+# Zendesk article attachment URL prefix, escaped once for the patterns built from it
+ATTACHMENT_URL_PREFIX = "https://support.userology.co/hc/article_attachments/"
+ESCAPED_ATTACHMENT_URL_PREFIX = re.escape(ATTACHMENT_URL_PREFIX)
+
 class OfflineWebsiteGenerator:
     def __init__(self, export_dir="zendesk_export_userology"):
         self.export_dir = export_dir
@@ -70,7 +74,7 @@ class OfflineWebsiteGenerator:
     def fix_image_urls(self, html_content):
         """Replace Zendesk image URLs with local paths and fix YouTube embeds"""
         # Pattern to match Zendesk article attachment URLs
-        pattern = r'https://support\.userology\.co/hc/article_attachments/(\d+)'
+        pattern = rf'{ESCAPED_ATTACHMENT_URL_PREFIX}(\d+)'
         
         def replace_url(match):
             attachment_id = match.group(1)
@@ -106,7 +110,7 @@ class OfflineWebsiteGenerator:
     def extract_attachments_from_html(self, html_content, article_id):
         """Extract attachment URLs from HTML content"""
         # Pattern to match Zendesk article attachment URLs
-        pattern = r'https://support\.userology\.co/hc/article_attachments/(\d+)'
+        pattern = rf'{ESCAPED_ATTACHMENT_URL_PREFIX}(\d+)'
         matches = re.findall(pattern, html_content)
         
         attachments = []
@@ -117,16 +121,17 @@ class OfflineWebsiteGenerator:
                 continue
             seen_attachments.add(attachment_id)
                 
-            attachment_url = f"https://support.userology.co/hc/article_attachments/{attachment_id}"
+            attachment_url = f"{ATTACHMENT_URL_PREFIX}{attachment_id}"
             
-            # Try to get the original filename from the HTML
-            img_pattern = rf'<img[^>]*src="{re.escape(attachment_url)}"[^>]*alt="([^"]*)"'
+            # Try to get the original filename from the HTML (the id is all digits, so only
+            # the constant prefix needs escaping)
+            img_pattern = rf'<img[^>]*src="{ESCAPED_ATTACHMENT_URL_PREFIX}{attachment_id}"[^>]*alt="([^"]*)"'
             img_match = re.search(img_pattern, html_content)
             if img_match:
                 original_filename = img_match.group(1)
             else:
                 # Try to get filename from title attribute
-                title_pattern = rf'<img[^>]*src="{re.escape(attachment_url)}"[^>]*title="([^"]*)"'
+                title_pattern = rf'<img[^>]*src="{ESCAPED_ATTACHMENT_URL_PREFIX}{attachment_id}"[^>]*title="([^"]*)"'
                 title_match = re.search(title_pattern, html_content)
                 if title_match:
                     original_filename = title_match.group(1)